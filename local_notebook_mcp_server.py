@@ -7,12 +7,20 @@ All functionality consolidated into a single file for maximum simplicity.
 """
 
 import os
+import sys
+import time
 import json
+import math
 import shutil
 import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from queue import Empty
+from typing import Any, Dict, List, Optional, Tuple
 
 try:
     from mcp.server.fastmcp import FastMCP
@@ -34,111 +42,437 @@ except ImportError:
     print("Error: jupyter_client not installed. Install with: pip install jupyter_client")
     exit(1)
 
+# Optional faster JSON parser; falls back to the standard library
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Copy-on-write file cloning (Linux FICLONE ioctl on btrfs/XFS/etc.)
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+_FICLONE = 0x40049409 if sys.platform.startswith("linux") and fcntl is not None else None
+
 # Initialize MCP server
 mcp = FastMCP("local-notebook-mcp-server")
 
-# Global kernel manager
+# Global kernel manager and its long-lived (async) client
 _kernel_manager: Optional[KernelManager] = None
+_kernel_client: Optional[Any] = None
 _current_kernel_spec = "python3"
 
+# Prefix hashes of the code cells execute_notebook has run on the live kernel
+_executed_notebook: Optional[str] = None
+_executed_hashes: List[str] = []
+
+# Serializes use of the shared kernel client; created on first use so it binds to the running loop
+_kernel_lock: Optional[asyncio.Lock] = None
+
+# Installed kernel specs, found once per process (list_kernels(refresh=True) rescans)
+_kernel_specs: Optional[Dict[str, str]] = None
+
+# Single thread the async tools save on, so serialization and fsync stay off
+# the event loop and saves still complete in order
+_save_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="notebook-save")
+
+# Cell types accepted by add_cell/apply_edits
+_CELL_TYPES = frozenset(("code", "markdown", "raw"))
+
+# Buffer size for streaming exports; large notebooks produce multi-MB scripts
+_WRITE_BUFFER_SIZE = 1 << 20
+
+# Metadata for notebooks created by create_notebook (copied per notebook)
+_DEFAULT_NOTEBOOK_METADATA = {
+    "kernelspec": {
+        "display_name": "Python 3",
+        "language": "python",
+        "name": "python3"
+    },
+    "language_info": {
+        "codemirror_mode": {"name": "ipython", "version": 3},
+        "file_extension": ".py",
+        "mimetype": "text/x-python",
+        "name": "python",
+        "nbconvert_exporter": "python",
+        "pygments_lexer": "ipython3",
+        "version": "3.8.5"
+    }
+}
+
+# Notebooks already backed up by this server process (resolved paths)
+_backed_up_paths = set()
+
+# Guards the parse cache, backups and saves: async tools save on _save_executor
+# while sync tools save on the event loop thread
+_notebook_lock = threading.RLock()
+
+# Parsed notebooks keyed by resolved path -> (st_mtime_ns, st_size, notebook)
+_NOTEBOOK_CACHE_SIZE = 16
+_notebook_cache: "OrderedDict[str, Tuple[int, int, nbformat.NotebookNode]]" = OrderedDict()
+
 
-def safe_load_notebook(notebook_path: str) -> nbformat.NotebookNode:
-    """Load a notebook file safely."""
-    with open(notebook_path, 'r', encoding='utf-8') as f:
-        notebook_data = json.load(f)
+def _cache_notebook(notebook_path: str, notebook: nbformat.NotebookNode, st: os.stat_result) -> None:
+    """Remember a parsed notebook against the mtime and size of the file it came from."""
+    abspath = os.path.abspath(notebook_path)
+    with _notebook_lock:
+        _notebook_cache[abspath] = (st.st_mtime_ns, st.st_size, notebook)
+        _notebook_cache.move_to_end(abspath)
+        while len(_notebook_cache) > _NOTEBOOK_CACHE_SIZE:
+            _notebook_cache.popitem(last=False)
+
+
+def normalize_source(value: Any) -> str:
+    """Return a cell source or output text as a string (lists are joined)."""
+    if type(value) is str:
+        return value
+    if value is None:
+        return ''
+    return ''.join(value) if type(value) is list else str(value)
+
+
+def _load_json(data: bytes) -> Any:
+    """Parse JSON bytes, using orjson when installed."""
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # orjson rejects the NaN/Infinity tokens json and nbformat write by default
+            pass
+    return json.loads(data)
+
+
+def _has_nonfinite(value: Any) -> bool:
+    """Return True if value holds a NaN or infinite float, which orjson writes as null."""
+    if type(value) is float:
+        return not math.isfinite(value)
+    if isinstance(value, dict):
+        return any(_has_nonfinite(item) for item in value.values())
+    if isinstance(value, list):
+        return any(_has_nonfinite(item) for item in value)
+    return False
+
+
+def _copy_notebook(notebook: nbformat.NotebookNode) -> nbformat.NotebookNode:
+    """Copy a notebook down to its cells, sharing everything below them."""
+    copied = nbformat.NotebookNode(notebook)
+    copied.cells = [nbformat.NotebookNode(cell) for cell in notebook.cells]
+    return copied
+
+
+def safe_load_notebook(notebook_path: str, readonly: bool = False) -> nbformat.NotebookNode:
+    """Load a notebook file safely.
+
+    Parsed notebooks are cached until the file's mtime or size changes. Callers
+    get a private copy unless readonly=True, in which case the shared cached
+    node is returned and must not be mutated. The private copy has its own
+    cell list and cells, whose fields may be reassigned, but nested values
+    such as outputs and metadata are shared and must not be changed in place.
+    """
+    # Key by the resolved path so a symlink and its target share one entry
+    real_path = os.path.realpath(notebook_path)
+    st = os.stat(real_path)
+    with _notebook_lock:
+        cached = _notebook_cache.get(real_path)
+        if cached is not None and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+            _notebook_cache.move_to_end(real_path)
+            notebook = cached[2]
+            return notebook if readonly else _copy_notebook(notebook)
+    
+    # Stat the handle actually read, so a concurrent rewrite can't be cached
+    # under the old contents
+    with open(real_path, 'rb') as f:
+        st = os.fstat(f.fileno())
+        data = f.read()
+    notebook_data = _load_json(data)
     
     # Clean up problematic fields
     if 'cells' in notebook_data:
         for cell in notebook_data['cells']:
-            if 'id' in cell:
-                del cell['id']
-            if 'source' in cell and isinstance(cell['source'], list):
-                cell['source'] = ''.join(cell['source'])
+            cell.pop('id', None)
+            # Sources saved by this server are already strings and left as is
+            source = cell.get('source')
+            if type(source) is not str:
+                cell['source'] = normalize_source(source)
     
-    return nbformat.from_dict(notebook_data)
+    notebook = nbformat.from_dict(notebook_data)
+    _cache_notebook(real_path, notebook, st)
+    return notebook if readonly else _copy_notebook(notebook)
+
+
+def _copy_file(src: str, dst: str) -> None:
+    """Copy a file, cloning it copy-on-write where the filesystem supports it."""
+    if _FICLONE is not None:
+        try:
+            with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+                fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+            shutil.copystat(src, dst)
+            return
+        except OSError:
+            pass
+    shutil.copy2(src, dst)
+
+
+def _dump_notebook(notebook: Dict[str, Any]) -> bytes:
+    """Serialize a notebook to indented UTF-8 JSON, using orjson when installed."""
+    # json keeps NaN/Infinity as written; orjson would silently turn them into null
+    if orjson is not None and not _has_nonfinite(notebook):
+        try:
+            return orjson.dumps(notebook, option=orjson.OPT_INDENT_2)
+        except TypeError:
+            # Types orjson does not know (e.g. odd metadata values) go through json
+            pass
+    return json.dumps(notebook, indent=2, ensure_ascii=False).encode('utf-8')
+
+
+def _fsync_directory(directory: str) -> None:
+    """Make a rename in directory durable; a no-op where directories can't be opened."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _backup_path(notebook_path: str) -> str:
+    """Return an unused <stem>_backup_YYYYMMDD_HHMMSS[_N].ipynb name in the cwd."""
+    stem = os.path.splitext(os.path.basename(notebook_path))[0]
+    base = f"{stem}_backup_{time.strftime('%Y%m%d_%H%M%S')}"
+    backup_path = f"{base}.ipynb"
+    counter = 1
+    # Same-named notebooks saved within one second must not overwrite each other's backup
+    while os.path.exists(backup_path):
+        backup_path = f"{base}_{counter}.ipynb"
+        counter += 1
+    return backup_path
 
 
 def safe_save_notebook(notebook: nbformat.NotebookNode, notebook_path: str) -> None:
-    """Save a notebook file safely."""
-    os.makedirs(os.path.dirname(notebook_path), exist_ok=True)
+    """Save a notebook file safely.
+
+    The saved node becomes the cached copy for notebook_path, so callers must
+    not mutate it afterwards.
+    """
+    # Write through symlinks: replacing the link itself would leave its target unedited
+    real_path = os.path.realpath(notebook_path)
+    directory = os.path.dirname(real_path)
+    if not os.path.isdir(directory):
+        os.makedirs(directory, exist_ok=True)
     
-    # Create backup if file exists
-    if os.path.exists(notebook_path):
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        backup_path = f"{Path(notebook_path).stem}_backup_{timestamp}.ipynb"
-        shutil.copy2(notebook_path, backup_path)
+    # NotebookNode is a dict, so serialize it as is; only stray non-string sources need fixing
+    for cell in notebook.cells:
+        source = cell.get('source', '')
+        if type(source) is not str:
+            cell['source'] = normalize_source(source)
     
-    # Convert to dict and save
-    notebook_dict = {
-        'cells': [],
-        'metadata': notebook.metadata,
-        'nbformat': notebook.nbformat,
-        'nbformat_minor': notebook.nbformat_minor
-    }
+    payload = _dump_notebook(notebook)
     
-    for cell in notebook.cells:
-        cell_dict = {
-            'cell_type': cell.cell_type,
-            'metadata': getattr(cell, 'metadata', {}),
-            'source': str(getattr(cell, 'source', ''))
-        }
-        
-        if cell.cell_type == 'code':
-            cell_dict['outputs'] = getattr(cell, 'outputs', [])
-            cell_dict['execution_count'] = getattr(cell, 'execution_count', None)
+    # Write to a uniquely named temporary file and swap it in so readers never see
+    # a torn notebook; one fsync of the data and one of the directory make the
+    # swap durable. The name is unique, so writing and syncing need no lock.
+    # Mode 0o666 lets the umask decide a new notebook's permissions, as open() would.
+    while True:
+        tmp_path = f"{real_path}.{os.urandom(6).hex()}.tmp"
+        try:
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0), 0o666)
+            break
+        except FileExistsError:
+            continue
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+            # Renaming keeps mtime and size, so this stat matches the saved file
+            st = os.fstat(f.fileno())
         
-        notebook_dict['cells'].append(cell_dict)
+        # Saves from the executor and the event loop must not interleave their
+        # backups, replaces and cache updates
+        with _notebook_lock:
+            if os.path.exists(real_path):
+                shutil.copymode(real_path, tmp_path)
+                
+                # Back up the original once per session rather than on every save.
+                # The replace below leaves the old inode untouched, so a hard link
+                # to it is a free backup; copy when linking is not possible.
+                if real_path not in _backed_up_paths:
+                    backup_path = _backup_path(notebook_path)
+                    try:
+                        os.link(real_path, backup_path)
+                    except OSError:
+                        _copy_file(real_path, backup_path)
+                    _backed_up_paths.add(real_path)
+            os.replace(tmp_path, real_path)
+            _cache_notebook(real_path, notebook, st)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
     
-    with open(notebook_path, 'w', encoding='utf-8') as f:
-        json.dump(notebook_dict, f, indent=2, ensure_ascii=False)
+    _fsync_directory(directory)
+
+
+def new_cell(cell_type: str, source: str) -> nbformat.NotebookNode:
+    """Build a cell node directly, skipping nbformat's per-cell schema validation."""
+    cell = nbformat.NotebookNode(cell_type=cell_type, metadata=nbformat.NotebookNode(), source=source)
+    if cell_type == "code":
+        cell.outputs = []
+        cell.execution_count = None
+    return cell
+
+
+def _stream_text(output: Dict[str, Any]) -> str:
+    """Return the text of a stream output."""
+    return normalize_source(output.get("text", ""))
+
+
+def _data_text(output: Dict[str, Any]) -> str:
+    """Return the text/plain form of a display or result output, or a [type] placeholder."""
+    data = output.get("data", {})
+    if "text/plain" in data:
+        return normalize_source(data["text/plain"])
+    return f"[{output['output_type']}]"
+
+
+def _error_text(output: Dict[str, Any]) -> str:
+    """Return the joined traceback of an error output."""
+    traceback = output.get("traceback", [])
+    try:
+        # Kernels send tracebacks as lists of strings, which join directly
+        return "\n".join(traceback)
+    except TypeError:
+        return "\n".join(str(line) for line in traceback)
+
+
+# Text extractors by output_type; other types are shown as "[<type>]"
+_OUTPUT_TEXT_HANDLERS = {
+    "stream": _stream_text,
+    "display_data": _data_text,
+    "execute_result": _data_text,
+    "error": _error_text
+}
 
 
 def extract_output_text(output: Dict[str, Any]) -> str:
     """Extract text from cell output."""
     output_type = output.get("output_type")
-    
-    if output_type == "stream":
-        text = output.get("text", "")
-        return str(text) if not isinstance(text, list) else ''.join(text)
-    elif output_type in ["display_data", "execute_result"]:
-        data = output.get("data", {})
-        if "text/plain" in data:
-            text = data["text/plain"]
-            return str(text) if not isinstance(text, list) else ''.join(text)
+    handler = _OUTPUT_TEXT_HANDLERS.get(output_type)
+    if handler is None:
         return f"[{output_type}]"
-    elif output_type == "error":
-        traceback = output.get("traceback", [])
-        return "\n".join(str(line) for line in traceback)
-    return f"[{output_type}]"
+    return handler(output)
 
 
-def ensure_kernel_manager(kernel_spec: str = "python3") -> KernelManager:
-    """Ensure kernel manager is running."""
-    global _kernel_manager, _current_kernel_spec
+def truncate_output_text(text: str, max_length: Optional[int]) -> str:
+    """Shorten output text to max_length characters, noting how much was cut."""
+    if max_length is None or len(text) <= max_length:
+        return text
+    return f"{text[:max_length]}\n... [{len(text) - max_length} more characters truncated]"
+
+
+def stop_kernel() -> None:
+    """Shut down the running kernel and its cached client, if any.
+
+    The kernel is stopped immediately rather than asked to exit, and killed
+    outright if that fails, so a wedged kernel cannot stall or leak.
+    """
+    global _kernel_manager, _kernel_client, _executed_hashes
+    
+    if _kernel_client is not None:
+        try:
+            _kernel_client.stop_channels()
+        except Exception:
+            pass
+        _kernel_client = None
     
-    if _kernel_manager is None or _current_kernel_spec != kernel_spec:
-        if _kernel_manager is not None:
+    if _kernel_manager is not None:
+        try:
+            _kernel_manager.shutdown_kernel(now=True)
+        except Exception:
             try:
-                _kernel_manager.shutdown_kernel()
-            except:
+                _kernel_manager.kill_kernel()
+            except Exception:
                 pass
+        _kernel_manager = None
+    
+    _executed_hashes = []
+
+
+def ensure_kernel_manager(kernel_spec: str = "python3") -> KernelManager:
+    """Ensure kernel manager is running, replacing a kernel that has died."""
+    global _kernel_manager, _current_kernel_spec
+    
+    if _kernel_manager is None or _current_kernel_spec != kernel_spec or not _kernel_manager.is_alive():
+        stop_kernel()
         
-        _kernel_manager = KernelManager(kernel_name=kernel_spec)
+        # Async clients let execute_cell await IOPub messages instead of polling
+        _kernel_manager = KernelManager(
+            kernel_name=kernel_spec,
+            client_class="jupyter_client.asynchronous.AsyncKernelClient"
+        )
         _kernel_manager.start_kernel()
         _current_kernel_spec = kernel_spec
     
     return _kernel_manager
 
 
+def _get_kernel_lock() -> asyncio.Lock:
+    """Return the lock held while a tool talks to the kernel."""
+    global _kernel_lock
+    if _kernel_lock is None:
+        _kernel_lock = asyncio.Lock()
+    return _kernel_lock
+
+
+async def ensure_kernel_client(kernel_spec: str = "python3") -> Any:
+    """Return the client for the running kernel, starting both if needed.
+
+    The client and its channels live as long as the kernel, so executions do
+    not pay for socket setup and the kernel handshake each time.
+    """
+    global _kernel_client
+    
+    km = ensure_kernel_manager(kernel_spec)
+    if _kernel_client is None:
+        kc = km.client()
+        kc.start_channels()
+        try:
+            await kc.wait_for_ready(timeout=60)
+        except:
+            kc.stop_channels()
+            raise
+        _kernel_client = kc
+    
+    return _kernel_client
+
+
 # File Operations
 @mcp.tool()
-def read_notebook(notebook_path: str) -> Dict[str, Any]:
-    """Read and parse a notebook file."""
+def read_notebook(notebook_path: str, offset: int = 0, limit: Optional[int] = None,
+                  max_output_length: Optional[int] = 10000) -> Dict[str, Any]:
+    """Read and parse a notebook file.
+
+    Large notebooks can be paged with offset/limit; next_offset is None once
+    the last cell has been returned. Output texts longer than
+    max_output_length are truncated (use get_cell for the full text, or pass
+    None to disable truncation).
+    """
     try:
-        notebook = safe_load_notebook(notebook_path)
+        if offset < 0 or (limit is not None and limit < 0) or (max_output_length is not None and max_output_length < 0):
+            return {"success": False, "error": "offset, limit and max_output_length must be non-negative"}
+        
+        notebook = safe_load_notebook(notebook_path, readonly=True)
+        total_cells = len(notebook.cells)
+        end = total_cells if limit is None else min(total_cells, offset + limit)
         
         cells_info = []
-        for i, cell in enumerate(notebook.cells):
+        for i in range(offset, end):
+            cell = notebook.cells[i]
             cell_info = {
                 "index": i,
                 "cell_type": cell.cell_type,
@@ -148,7 +482,10 @@ def read_notebook(notebook_path: str) -> Dict[str, Any]:
             
             if cell.cell_type == "code":
                 cell_info["execution_count"] = getattr(cell, 'execution_count', None)
-                cell_info["outputs"] = [extract_output_text(output) for output in getattr(cell, 'outputs', [])]
+                cell_info["outputs"] = [
+                    truncate_output_text(extract_output_text(output), max_output_length)
+                    for output in getattr(cell, 'outputs', [])
+                ]
             
             cells_info.append(cell_info)
         
@@ -156,13 +493,22 @@ def read_notebook(notebook_path: str) -> Dict[str, Any]:
             "success": True,
             "notebook_path": notebook_path,
             "metadata": notebook.metadata,
-            "cells_count": len(notebook.cells),
-            "cells": cells_info
+            "cells_count": total_cells,
+            "cells": cells_info,
+            "next_offset": end if end < total_cells else None
         }
     except Exception as e:
         return {"success": False, "error": str(e)}
 
 
+def _scan_notebooks(directory: Path) -> List[os.DirEntry]:
+    """Return the notebook files directly in directory, sorted by name."""
+    # scandir yields names and cached stat results from one directory read
+    with os.scandir(directory) as entries:
+        notebooks = [entry for entry in entries if entry.name.endswith(".ipynb") and entry.is_file()]
+    return sorted(notebooks, key=lambda entry: entry.name)
+
+
 @mcp.tool()
 def list_notebooks(directory: str = ".") -> Dict[str, Any]:
     """List all notebook files in a directory."""
@@ -172,13 +518,14 @@ def list_notebooks(directory: str = ".") -> Dict[str, Any]:
             return {"success": False, "error": f"Directory {directory} does not exist"}
         
         notebooks = []
-        for notebook_path in path_obj.glob("*.ipynb"):
+        for entry in _scan_notebooks(path_obj):
             try:
+                st = entry.stat()
                 info = {
-                    "path": str(notebook_path),
-                    "name": notebook_path.name,
-                    "size": notebook_path.stat().st_size,
-                    "modified": datetime.fromtimestamp(notebook_path.stat().st_mtime).isoformat()
+                    "path": str(path_obj / entry.name),
+                    "name": entry.name,
+                    "size": st.st_size,
+                    "modified": datetime.fromtimestamp(st.st_mtime).isoformat()
                 }
                 notebooks.append(info)
             except:
@@ -187,7 +534,7 @@ def list_notebooks(directory: str = ".") -> Dict[str, Any]:
         return {
             "success": True,
             "directory": directory,
-            "notebooks": sorted(notebooks, key=lambda x: x["name"])
+            "notebooks": notebooks
         }
     except Exception as e:
         return {"success": False, "error": str(e)}
@@ -198,28 +545,12 @@ def create_notebook(notebook_path: str, title: str = "New Notebook") -> Dict[str
     """Create a new notebook."""
     try:
         notebook = nbf.new_notebook()
-        notebook.metadata = {
-            "kernelspec": {
-                "display_name": "Python 3",
-                "language": "python",
-                "name": "python3"
-            },
-            "language_info": {
-                "codemirror_mode": {"name": "ipython", "version": 3},
-                "file_extension": ".py",
-                "mimetype": "text/x-python",
-                "name": "python",
-                "nbconvert_exporter": "python",
-                "pygments_lexer": "ipython3",
-                "version": "3.8.5"
-            },
-            "title": title
-        }
+        notebook.metadata = nbformat.from_dict({**_DEFAULT_NOTEBOOK_METADATA, "title": title})
         
         # Add title cell
-        notebook.cells.append(nbf.new_markdown_cell(f"# {title}"))
+        notebook.cells.append(new_cell("markdown", f"# {title}"))
         # Add code cell
-        notebook.cells.append(nbf.new_code_cell("# Your code here"))
+        notebook.cells.append(new_cell("code", "# Your code here"))
         
         safe_save_notebook(notebook, notebook_path)
         
@@ -234,27 +565,46 @@ def create_notebook(notebook_path: str, title: str = "New Notebook") -> Dict[str
 
 
 # Cell Operations
+def _apply_add(notebook: nbformat.NotebookNode, cell_type: str, content: str, index: Optional[int] = None) -> int:
+    """Insert a new cell in memory and return its index."""
+    if cell_type not in _CELL_TYPES:
+        raise ValueError(f"Invalid cell type: {cell_type}")
+    
+    cell = new_cell(cell_type, content)
+    if index is None:
+        notebook.cells.append(cell)
+        return len(notebook.cells) - 1
+    notebook.cells.insert(index, cell)
+    return index
+
+
+def _apply_modify(notebook: nbformat.NotebookNode, index: int, content: str) -> str:
+    """Replace a cell's source in memory and return its cell type."""
+    if index < 0 or index >= len(notebook.cells):
+        raise IndexError(f"Cell index {index} out of range")
+    
+    cell = notebook.cells[index]
+    cell.source = content
+    if cell.cell_type == "code":
+        cell.outputs = []
+        cell.execution_count = None
+    return cell.cell_type
+
+
+def _apply_delete(notebook: nbformat.NotebookNode, index: int) -> None:
+    """Remove a cell in memory."""
+    if index < 0 or index >= len(notebook.cells):
+        raise IndexError(f"Cell index {index} out of range")
+    
+    notebook.cells.pop(index)
+
+
 @mcp.tool()
 def add_cell(notebook_path: str, cell_type: str, content: str, index: Optional[int] = None) -> Dict[str, Any]:
     """Add a new cell to a notebook."""
     try:
         notebook = safe_load_notebook(notebook_path)
-        
-        if cell_type == "code":
-            new_cell = nbf.new_code_cell(content)
-        elif cell_type == "markdown":
-            new_cell = nbf.new_markdown_cell(content)
-        elif cell_type == "raw":
-            new_cell = nbf.new_raw_cell(content)
-        else:
-            return {"success": False, "error": f"Invalid cell type: {cell_type}"}
-        
-        if index is None:
-            notebook.cells.append(new_cell)
-            index = len(notebook.cells) - 1
-        else:
-            notebook.cells.insert(index, new_cell)
-        
+        index = _apply_add(notebook, cell_type, content, index)
         safe_save_notebook(notebook, notebook_path)
         
         return {
@@ -273,23 +623,14 @@ def modify_cell(notebook_path: str, index: int, content: str) -> Dict[str, Any]:
     """Modify an existing cell."""
     try:
         notebook = safe_load_notebook(notebook_path)
-        
-        if index < 0 or index >= len(notebook.cells):
-            return {"success": False, "error": f"Cell index {index} out of range"}
-        
-        notebook.cells[index].source = content
-        
-        if notebook.cells[index].cell_type == "code":
-            notebook.cells[index].outputs = []
-            notebook.cells[index].execution_count = None
-        
+        cell_type = _apply_modify(notebook, index, content)
         safe_save_notebook(notebook, notebook_path)
         
         return {
             "success": True,
             "notebook_path": notebook_path,
             "index": index,
-            "cell_type": notebook.cells[index].cell_type
+            "cell_type": cell_type
         }
     except Exception as e:
         return {"success": False, "error": str(e)}
@@ -300,11 +641,7 @@ def delete_cell(notebook_path: str, index: int) -> Dict[str, Any]:
     """Delete a cell from a notebook."""
     try:
         notebook = safe_load_notebook(notebook_path)
-        
-        if index < 0 or index >= len(notebook.cells):
-            return {"success": False, "error": f"Cell index {index} out of range"}
-        
-        deleted_cell = notebook.cells.pop(index)
+        _apply_delete(notebook, index)
         safe_save_notebook(notebook, notebook_path)
         
         return {
@@ -317,11 +654,76 @@ def delete_cell(notebook_path: str, index: int) -> Dict[str, Any]:
         return {"success": False, "error": str(e)}
 
 
+@mcp.tool()
+def apply_edits(notebook_path: str, edits: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Apply several cell edits in order with a single load and save.
+
+    Each edit is a dict with "op" set to "add" (cell_type, content, optional
+    index), "modify" (index, content) or "delete" (index). Edits are all or
+    nothing: if one fails, the notebook is left unchanged.
+    """
+    try:
+        if not edits:
+            # Nothing to apply: leave the file (and its backup) alone
+            notebook = safe_load_notebook(notebook_path, readonly=True)
+            return {
+                "success": True,
+                "notebook_path": notebook_path,
+                "applied_edits": 0,
+                "total_cells": len(notebook.cells),
+                "results": []
+            }
+        
+        notebook = safe_load_notebook(notebook_path)
+        
+        results = []
+        for edit in edits:
+            op = edit.get("op")
+            try:
+                if op == "add":
+                    index = _apply_add(notebook, edit["cell_type"], edit["content"], edit.get("index"))
+                elif op == "modify":
+                    index = edit["index"]
+                    _apply_modify(notebook, index, edit["content"])
+                elif op == "delete":
+                    index = edit["index"]
+                    _apply_delete(notebook, index)
+                else:
+                    raise ValueError(f"Invalid edit op: {op}")
+            except KeyError as e:
+                results.append({"op": op, "success": False, "error": f"Missing field {e} for {op} edit"})
+                break
+            except Exception as e:
+                results.append({"op": op, "success": False, "error": str(e)})
+                break
+            results.append({"op": op, "success": True, "index": index})
+        
+        if results and not results[-1]["success"]:
+            return {
+                "success": False,
+                "notebook_path": notebook_path,
+                "error": results[-1]["error"],
+                "results": results
+            }
+        
+        safe_save_notebook(notebook, notebook_path)
+        
+        return {
+            "success": True,
+            "notebook_path": notebook_path,
+            "applied_edits": len(results),
+            "total_cells": len(notebook.cells),
+            "results": results
+        }
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+
 @mcp.tool()
 def get_cell(notebook_path: str, index: int) -> Dict[str, Any]:
     """Get content of a specific cell."""
     try:
-        notebook = safe_load_notebook(notebook_path)
+        notebook = safe_load_notebook(notebook_path, readonly=True)
         
         if index < 0 or index >= len(notebook.cells):
             return {"success": False, "error": f"Cell index {index} out of range"}
@@ -345,87 +747,206 @@ def get_cell(notebook_path: str, index: int) -> Dict[str, Any]:
 
 
 # Code Execution
-@mcp.tool()
-async def execute_cell(notebook_path: str, index: int, kernel_spec: str = "python3", timeout: int = 30) -> Dict[str, Any]:
-    """Execute a code cell."""
+def _execution_cache_path(notebook_path: str) -> str:
+    """Sidecar file holding cached outputs for a notebook."""
+    return f"{os.path.splitext(notebook_path)[0]}.ipynb_cache.json"
+
+
+def _execution_cache_keys(notebook: nbformat.NotebookNode, code_cells: List[int], kernel_spec: str) -> List[str]:
+    """Hash each code cell's source together with every code cell before it."""
+    digest = hashlib.blake2b(kernel_spec.encode('utf-8'), digest_size=16)
+    keys = []
+    for i in code_cells:
+        digest.update(b'\0')
+        digest.update(str(notebook.cells[i].source).encode('utf-8'))
+        keys.append(digest.copy().hexdigest())
+    return keys
+
+
+def _load_execution_cache(cache_path: str) -> Dict[str, Any]:
+    """Load cached outputs, treating a missing or unreadable cache as empty."""
     try:
-        notebook = safe_load_notebook(notebook_path)
-        
-        if index < 0 or index >= len(notebook.cells):
-            return {"success": False, "error": f"Cell index {index} out of range"}
-        
+        with open(cache_path, 'rb') as f:
+            data = f.read()
+        return _load_json(data)
+    except (OSError, ValueError):
+        return {}
+
+
+def _get_code_cell(notebook: nbformat.NotebookNode, index: int) -> nbformat.NotebookNode:
+    """Return the code cell at index, raising IndexError/ValueError otherwise."""
+    try:
+        if index < 0:
+            raise IndexError
         cell = notebook.cells[index]
-        if cell.cell_type != "code":
-            return {"success": False, "error": f"Cell {index} is not a code cell"}
-        
-        km = ensure_kernel_manager(kernel_spec)
-        kc = km.client()
-        
-        # Clear outputs
-        cell.outputs = []
-        
-        # Execute
-        msg_id = kc.execute(cell.source)
+    except IndexError:
+        raise IndexError(f"Cell index {index} out of range") from None
+    
+    if cell.cell_type != "code":
+        raise ValueError(f"Cell {index} is not a code cell")
+    return cell
+
+
+async def _save_notebook_async(notebook: nbformat.NotebookNode, notebook_path: str) -> None:
+    """Run safe_save_notebook on the save thread without blocking the event loop."""
+    await asyncio.get_running_loop().run_in_executor(_save_executor, safe_save_notebook, notebook, notebook_path)
+
+
+async def _run_code_cell(notebook: nbformat.NotebookNode, index: int, kernel_spec: str, timeout: float,
+                         kc: Any = None) -> Dict[str, Any]:
+    """Execute one code cell of an in-memory notebook, storing outputs on the cell.
+
+    kc defaults to the shared client for the kernel_spec kernel. The caller
+    is responsible for saving the notebook. If the cell is still running at
+    the timeout, the kernel is interrupted and the result has timed_out=True
+    with whatever output arrived so far.
+    """
+    cell = _get_code_cell(notebook, index)
+    if kc is None:
+        kc = await ensure_kernel_client(kernel_spec)
+    
+    # Clear outputs; new ones are collected straight onto the cell
+    outputs = cell.outputs = []
+    
+    # Execute
+    msg_id = kc.execute(cell.source)
+    
+    execution_count = None
+    
+    deadline = time.monotonic() + timeout
+    
+    # After 'idle', keep draining without blocking to pick up late output
+    idle = False
+    while True:
+        if idle:
+            remaining = 0
+        else:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+        try:
+            # Wake up every second to notice a kernel that died mid-cell
+            msg = await kc.get_iopub_msg(timeout=min(remaining, 1))
+        except Empty:
+            if idle:
+                break
+            if _kernel_manager is not None and not _kernel_manager.is_alive():
+                raise RuntimeError("Kernel died during execution")
+            continue
         
-        outputs = []
-        execution_count = None
+        # Skip leftovers from earlier requests (e.g. a cell that timed out)
+        if msg['parent_header'].get('msg_id') != msg_id:
+            continue
         
-        import time
-        start_time = time.time()
+        msg_type = msg['msg_type']
+        content = msg['content']
         
-        while time.time() - start_time < timeout:
+        if msg_type == 'execute_input':
+            execution_count = content['execution_count']
+        elif msg_type == 'stream':
+            output = {
+                'output_type': 'stream',
+                'name': content.get('name', 'stdout'),
+                'text': content.get('text', '')
+            }
+            outputs.append(output)
+        elif msg_type in ['display_data', 'execute_result']:
+            output = {
+                'output_type': msg_type,
+                'data': content.get('data') or {},
+                'metadata': content.get('metadata') or {}
+            }
+            if msg_type == 'execute_result':
+                output['execution_count'] = content.get('execution_count')
+            outputs.append(output)
+        elif msg_type == 'error':
+            error_output = {
+                'output_type': 'error',
+                'ename': content['ename'],
+                'evalue': content['evalue'],
+                'traceback': content['traceback']
+            }
+            outputs.append(error_output)
+        elif msg_type == 'status' and content['execution_state'] == 'idle':
+            idle = True
+    
+    # The shell reply is authoritative for execution_count; reading it also keeps
+    # replies from piling up on the shared client. Stale replies are skipped.
+    while idle:
+        try:
+            reply = await kc.get_shell_msg(timeout=max(deadline - time.monotonic(), 0))
+        except Empty:
+            break
+        if reply['parent_header'].get('msg_id') == msg_id:
+            execution_count = reply['content'].get('execution_count', execution_count)
+            break
+    
+    if execution_count is not None:
+        cell.execution_count = execution_count
+    
+    # Interrupt a cell that outlived its timeout so the next request doesn't queue
+    # behind it. Wait (briefly) for its reply too: the kernel aborts requests that
+    # arrive while it is still handling the interrupted cell's error.
+    timed_out = not idle
+    if timed_out and _kernel_manager is not None:
+        _kernel_manager.interrupt_kernel()
+        grace = time.monotonic() + 10
+        while True:
             try:
-                msg = kc.get_iopub_msg(timeout=0.5)
-                msg_type = msg['msg_type']
-                content = msg['content']
-                
-                if msg_type == 'execute_input':
-                    execution_count = content['execution_count']
-                elif msg_type == 'stream':
-                    output = {
-                        'output_type': 'stream',
-                        'name': content.get('name', 'stdout'),
-                        'text': content.get('text', '')
-                    }
-                    outputs.append(output)
-                    cell.outputs.append(output)
-                elif msg_type in ['display_data', 'execute_result']:
-                    output = {
-                        'output_type': msg_type,
-                        'data': content.get('data', {}),
-                        'metadata': content.get('metadata', {})
-                    }
-                    if msg_type == 'execute_result':
-                        output['execution_count'] = content.get('execution_count')
-                    outputs.append(output)
-                    cell.outputs.append(output)
-                elif msg_type == 'error':
-                    error_output = {
-                        'output_type': 'error',
-                        'ename': content['ename'],
-                        'evalue': content['evalue'],
-                        'traceback': content['traceback']
-                    }
-                    outputs.append(error_output)
-                    cell.outputs.append(error_output)
-                elif msg_type == 'status' and content['execution_state'] == 'idle':
-                    break
-                        
-            except:
-                await asyncio.sleep(0.1)
-                continue
+                reply = await kc.get_shell_msg(timeout=max(grace - time.monotonic(), 0))
+            except Empty:
+                break
+            if reply['parent_header'].get('msg_id') == msg_id:
+                break
+    
+    return {"execution_count": execution_count, "outputs": outputs, "timed_out": timed_out}
+
+
+async def _reset_namespace(kc: Any, timeout: float = 30) -> None:
+    """Clear the user namespace of a running IPython kernel without restarting it."""
+    msg_id = kc.execute("%reset -f", silent=True, store_history=False)
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            reply = await kc.get_shell_msg(timeout=max(deadline - time.monotonic(), 0))
+        except Empty:
+            raise TimeoutError("Timed out resetting the kernel namespace") from None
+        if reply['parent_header'].get('msg_id') != msg_id:
+            continue
+        content = reply['content']
+        if content.get('status') != 'ok':
+            raise RuntimeError(f"Failed to reset the kernel namespace: {content.get('ename', content.get('status'))}")
+        return
+
+
+@mcp.tool()
+async def execute_cell(notebook_path: str, index: int, kernel_spec: str = "python3", timeout: int = 30) -> Dict[str, Any]:
+    """Execute a code cell."""
+    try:
+        notebook = safe_load_notebook(notebook_path)
         
-        if execution_count is not None:
-            cell.execution_count = execution_count
+        global _executed_notebook, _executed_hashes
+        async with _get_kernel_lock():
+            # Running an arbitrary cell changes kernel state behind execute_notebook
+            _executed_notebook = os.path.abspath(notebook_path)
+            _executed_hashes = []
+            
+            result = await _run_code_cell(notebook, index, kernel_spec, timeout)
+        await _save_notebook_async(notebook, notebook_path)
         
-        safe_save_notebook(notebook, notebook_path)
+        if result["timed_out"]:
+            return {
+                "success": False,
+                "error": f"Cell execution timed out after {timeout}s",
+                "outputs": [extract_output_text(output) for output in result["outputs"]]
+            }
         
         return {
             "success": True,
             "notebook_path": notebook_path,
             "index": index,
-            "execution_count": execution_count,
-            "outputs": [extract_output_text(output) for output in outputs]
+            "execution_count": result["execution_count"],
+            "outputs": [extract_output_text(output) for output in result["outputs"]]
         }
                     
     except Exception as e:
@@ -433,40 +954,162 @@ async def execute_cell(notebook_path: str, index: int, kernel_spec: str = "pytho
 
 
 @mcp.tool()
-async def execute_notebook(notebook_path: str, kernel_spec: str = "python3", timeout: int = 300) -> Dict[str, Any]:
-    """Execute all code cells in a notebook."""
+async def execute_notebook(notebook_path: str, kernel_spec: str = "python3", timeout: int = 300,
+                           use_cache: bool = False, clear_cache: bool = False,
+                           force_restart: bool = False, reset_namespace: bool = False) -> Dict[str, Any]:
+    """Execute all code cells in a notebook.
+
+    The kernel is kept warm between runs. If the previous run of this
+    notebook finished without errors and code cells have only been appended
+    since, the cells it already ran are skipped and only the new ones run.
+    Otherwise (edited or removed cells, errors, another notebook, or
+    execute_cell in between) the namespace of the warm kernel is cleared
+    with %reset -f, restarting the kernel if that fails, and every cell
+    runs, so the results match a fresh kernel. force_restart=True always
+    restarts the kernel; reset_namespace=True always clears the namespace.
+
+    With use_cache=True, outputs of a complete run are stored next to the
+    notebook and reused without starting a kernel as long as no code cell's
+    source (or the kernel spec) has changed. clear_cache=True discards them.
+    """
     try:
         notebook = safe_load_notebook(notebook_path)
+        code_cells = [i for i, cell in enumerate(notebook.cells) if cell.cell_type == "code"]
         
-        # Restart kernel for clean execution
-        global _kernel_manager
-        if _kernel_manager is not None:
-            try:
-                _kernel_manager.shutdown_kernel()
-            except:
-                pass
-            _kernel_manager = None
+        cache_path = _execution_cache_path(notebook_path)
+        cache_keys = _execution_cache_keys(notebook, code_cells, kernel_spec)
+        if clear_cache and os.path.exists(cache_path):
+            os.remove(cache_path)
         
-        results = []
-        code_cells = [i for i, cell in enumerate(notebook.cells) if cell.cell_type == "code"]
+        # A requested restart or reset means the caller wants a fresh run, not stored outputs
+        if use_cache and code_cells and not (force_restart or reset_namespace):
+            cache = _load_execution_cache(cache_path)
+            if all(key in cache for key in cache_keys):
+                # Only rewrite the file if the cached results differ from what it holds
+                results = []
+                dirty = False
+                for i, key in zip(code_cells, cache_keys):
+                    cell = notebook.cells[i]
+                    entry = cache[key]
+                    if cell.outputs != entry["outputs"]:
+                        cell.outputs = entry["outputs"]
+                        dirty = True
+                    if cell.execution_count != entry["execution_count"]:
+                        cell.execution_count = entry["execution_count"]
+                        dirty = True
+                    results.append({
+                        "index": i,
+                        "success": True,
+                        "outputs": [extract_output_text(output) for output in cell.outputs],
+                        "error": None
+                    })
+                if dirty:
+                    await _save_notebook_async(notebook, notebook_path)
+                
+                return {
+                    "success": True,
+                    "notebook_path": notebook_path,
+                    "total_code_cells": len(code_cells),
+                    "executed_cells": len(results),
+                    "skipped_cells": 0,
+                    "cached": True,
+                    "results": results
+                }
         
-        for i in code_cells:
-            result = await execute_cell(notebook_path, i, kernel_spec, timeout // len(code_cells) if code_cells else 30)
-            results.append({
-                "index": i,
-                "success": result["success"],
-                "outputs": result.get("outputs", []),
-                "error": result.get("error")
-            })
+        # Concurrent runs would otherwise interleave on the one kernel client
+        global _executed_notebook, _executed_hashes
+        async with _get_kernel_lock():
+            abspath = os.path.abspath(notebook_path)
+            warm = _kernel_manager is not None and _current_kernel_spec == kernel_spec and _kernel_manager.is_alive()
+            start = 0
+            if force_restart:
+                # Keep the event loop free while the old kernel process goes away
+                await asyncio.get_running_loop().run_in_executor(None, stop_kernel)
+            elif warm:
+                # Skip the unchanged prefix only if the kernel's last run ended exactly
+                # there; later cells it ran (since edited or removed) still left state
+                if not reset_namespace and _executed_notebook == abspath:
+                    prefix = _executed_hashes
+                    while start < min(len(prefix), len(cache_keys)) and prefix[start] == cache_keys[start]:
+                        start += 1
+                    if start != len(prefix):
+                        start = 0
+                
+                # Otherwise clear whatever the kernel ran before so this run starts clean
+                if start == 0:
+                    try:
+                        await _reset_namespace(await ensure_kernel_client(kernel_spec))
+                        _executed_hashes = []
+                    except Exception:
+                        if reset_namespace:
+                            raise
+                        await asyncio.get_running_loop().run_in_executor(None, stop_kernel)
+            pending = code_cells[start:]
             
-            if not result["success"]:
-                break
+            # Run every pending cell against the one in-memory notebook and save once
+            results = []
+            clean_prefix = start
+            kc = await ensure_kernel_client(kernel_spec) if pending else None
+            
+            # One budget for the whole run: time a quick cell leaves unused goes to later cells
+            deadline = time.monotonic() + timeout
+            for i in pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    results.append({"index": i, "success": False, "outputs": [], "error": "Notebook execution timed out"})
+                    break
+                try:
+                    result = await _run_code_cell(notebook, i, kernel_spec, remaining, kc)
+                except Exception as e:
+                    results.append({"index": i, "success": False, "outputs": [], "error": str(e)})
+                    break
+                
+                results.append({
+                    "index": i,
+                    "success": not result["timed_out"],
+                    "outputs": [extract_output_text(output) for output in result["outputs"]],
+                    "error": "Notebook execution timed out" if result["timed_out"] else None
+                })
+                if result["timed_out"]:
+                    break
+                
+                # Only an unbroken run of cells without errors can be skipped next time
+                if clean_prefix == start + len(results) - 1 and not any(
+                        output.get('output_type') == 'error' for output in notebook.cells[i].outputs):
+                    clean_prefix += 1
+            
+            if results:
+                await _save_notebook_async(notebook, notebook_path)
+            
+            # Record what the kernel ran only if all of it is clean; anything else
+            # makes the next run reset first
+            ran = start + len(results)
+            _executed_notebook = abspath
+            _executed_hashes = cache_keys[:ran] if clean_prefix == ran else []
+        
+        # Outputs are only worth reusing when every code cell ran without an error
+        if use_cache and code_cells and clean_prefix == len(code_cells):
+            cache = {
+                key: {
+                    "outputs": notebook.cells[i].outputs,
+                    "execution_count": notebook.cells[i].execution_count
+                }
+                for i, key in zip(code_cells, cache_keys)
+            }
+            if orjson is not None and not _has_nonfinite(cache):
+                payload = orjson.dumps(cache)
+            else:
+                payload = json.dumps(cache, ensure_ascii=False).encode('utf-8')
+            with open(cache_path, 'wb') as f:
+                f.write(payload)
         
         return {
             "success": True,
             "notebook_path": notebook_path,
             "total_code_cells": len(code_cells),
             "executed_cells": len(results),
+            "skipped_cells": start,
+            "cached": False,
             "results": results
         }
         
@@ -479,7 +1122,7 @@ async def execute_notebook(notebook_path: str, kernel_spec: str = "python3", tim
 def search_cells(notebook_path: str, search_term: str, case_sensitive: bool = False) -> Dict[str, Any]:
     """Search for content across cells."""
     try:
-        notebook = safe_load_notebook(notebook_path)
+        notebook = safe_load_notebook(notebook_path, readonly=True)
         
         matches = []
         search_text = search_term if case_sensitive else search_term.lower()
@@ -488,23 +1131,44 @@ def search_cells(notebook_path: str, search_term: str, case_sensitive: bool = Fa
             cell_content = str(getattr(cell, 'source', ''))
             check_content = cell_content if case_sensitive else cell_content.lower()
             
-            if search_text in check_content:
-                lines = cell_content.split('\n')
-                matching_lines = []
-                
-                for line_num, line in enumerate(lines):
-                    check_line = line if case_sensitive else line.lower()
-                    if search_text in check_line:
-                        matching_lines.append({
-                            "line_number": line_num + 1,
-                            "content": line.strip()
-                        })
+            pos = check_content.find(search_text)
+            if pos == -1:
+                continue
+            
+            # Lines are matched one at a time, so a term spanning lines matches
+            # the cell but no individual line
+            if '\n' in search_text:
+                pos = -1
+            
+            # lower() can change the length of some characters; only then fall
+            # back to splitting the original text to recover line contents
+            lines = None if len(check_content) == len(cell_content) else cell_content.split('\n')
+            matching_lines = []
+            line_number = 1
+            counted_to = 0
+            
+            while pos != -1:
+                line_start = check_content.rfind('\n', 0, pos) + 1
+                line_end = check_content.find('\n', pos)
+                if line_end == -1:
+                    line_end = len(check_content)
+                line_number += check_content.count('\n', counted_to, line_start)
+                counted_to = line_start
                 
-                matches.append({
-                    "cell_index": i,
-                    "cell_type": cell.cell_type,
-                    "matching_lines": matching_lines
+                line = cell_content[line_start:line_end] if lines is None else lines[line_number - 1]
+                matching_lines.append({
+                    "line_number": line_number,
+                    "content": line.strip()
                 })
+                
+                # Resume after this line so each line is reported once
+                pos = check_content.find(search_text, line_end + 1) if line_end < len(check_content) else -1
+            
+            matches.append({
+                "cell_index": i,
+                "cell_type": cell.cell_type,
+                "matching_lines": matching_lines
+            })
         
         return {
             "success": True,
@@ -517,30 +1181,67 @@ def search_cells(notebook_path: str, search_term: str, case_sensitive: bool = Fa
         return {"success": False, "error": str(e)}
 
 
+@mcp.tool()
+def search_notebooks(directory: str, search_term: str, case_sensitive: bool = False) -> Dict[str, Any]:
+    """Search for content across all notebooks in a directory."""
+    try:
+        path_obj = Path(directory)
+        if not path_obj.exists():
+            return {"success": False, "error": f"Directory {directory} does not exist"}
+        
+        results = []
+        # Notebooks that could not be searched (e.g. invalid JSON) are reported, not dropped
+        errors = []
+        for entry in _scan_notebooks(path_obj):
+            notebook_path = str(path_obj / entry.name)
+            result = search_cells(notebook_path, search_term, case_sensitive)
+            if not result["success"]:
+                errors.append({"notebook_path": notebook_path, "error": result["error"]})
+            elif result["matches_found"]:
+                results.append({
+                    "notebook_path": notebook_path,
+                    "matches_found": result["matches_found"],
+                    "matches": result["matches"]
+                })
+        
+        return {
+            "success": True,
+            "directory": directory,
+            "search_term": search_term,
+            "notebooks_matched": len(results),
+            "results": results,
+            "errors": errors
+        }
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+
 @mcp.tool()
 def export_to_python(notebook_path: str, output_path: Optional[str] = None) -> Dict[str, Any]:
     """Export notebook to Python script."""
     try:
-        notebook = safe_load_notebook(notebook_path)
+        notebook = safe_load_notebook(notebook_path, readonly=True)
         
         if output_path is None:
             output_path = notebook_path.replace('.ipynb', '.py')
         
-        python_code = []
-        
-        for i, cell in enumerate(notebook.cells):
-            if cell.cell_type == "code":
-                python_code.append(f"# Cell {i + 1}")
-                python_code.append(str(getattr(cell, 'source', '')))
-                python_code.append("")
-            elif cell.cell_type == "markdown":
-                python_code.append(f"# Markdown Cell {i + 1}")
-                for line in str(getattr(cell, 'source', '')).split('\n'):
-                    python_code.append(f"# {line}")
-                python_code.append("")
-        
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write('\n'.join(python_code))
+        # Stream cells straight to the file; blocks are separated by a blank line
+        with open(output_path, 'w', encoding='utf-8', buffering=_WRITE_BUFFER_SIZE) as f:
+            separator = ""
+            for i, cell in enumerate(notebook.cells):
+                source = str(getattr(cell, 'source', ''))
+                if cell.cell_type == "code":
+                    f.write(f"{separator}# Cell {i + 1}\n")
+                    f.write(source)
+                    f.write("\n")
+                elif cell.cell_type == "markdown":
+                    f.write(f"{separator}# Markdown Cell {i + 1}\n# ")
+                    # Comment out every line in one pass instead of splitting
+                    f.write(source.replace('\n', '\n# '))
+                    f.write("\n")
+                else:
+                    continue
+                separator = "\n"
         
         return {
             "success": True,
@@ -553,13 +1254,20 @@ def export_to_python(notebook_path: str, output_path: Optional[str] = None) -> D
 
 
 @mcp.tool()
-def list_kernels() -> Dict[str, Any]:
-    """List available kernel specifications."""
+def list_kernels(refresh: bool = False) -> Dict[str, Any]:
+    """List available kernel specifications.
+
+    The kernelspec directories are scanned on the first call only; pass
+    refresh=True to pick up kernels installed since.
+    """
+    global _kernel_specs
+    
     try:
-        kernels = find_kernel_specs()
+        if _kernel_specs is None or refresh:
+            _kernel_specs = find_kernel_specs()
         return {
             "success": True,
-            "available_kernels": list(kernels.keys()),
+            "available_kernels": list(_kernel_specs.keys()),
             "current_kernel": _current_kernel_spec
         }
     except Exception as e:
@@ -32,6 +32,9 @@ setup(
         "jupyter-client>=7.0.0",
         "ipykernel>=6.0.0"
     ],
+    extras_require={
+        "fast": ["orjson>=3.9.0"],
+    },
     entry_points={
         "console_scripts": [
             "local-notebook-mcp-server=local_notebook_mcp_server:main",